@@ -0,0 +1,62 @@
+'''_composite.py - Accelerated RGBA-over-color compositing.
+
+Uses an optional Numba JIT kernel (parallelized over rows) to flatten
+RGBA frames onto a solid background color. Both NumPy and Numba are
+optional dependencies; when either is missing, or the pixbuf layout is
+not suitable, callers fall back to GdkPixbuf's own compositing.
+'''
+
+from gi.repository import GdkPixbuf, GLib
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+if njit is not None:
+
+    @njit(parallel=True, cache=True, nogil=True)
+    def _composite_rows(rgba, bg, out):
+        height, width = rgba.shape[:2]
+        for y in prange(height):
+            for x in range(width):
+                alpha = rgba[y, x, 3]
+                inv = 255 - alpha
+                for c in range(3):
+                    out[y, x, c] = (rgba[y, x, c] * alpha
+                                    + bg[c] * inv + 127) // 255
+                out[y, x, 3] = 255
+
+def composite_over_color(pixbuf, color):
+    '''Composite the RGBA <pixbuf> over the solid <color> (0xRRGGBB int).
+
+    Return a new, fully opaque pixbuf, or None if the accelerated path
+    is unavailable (missing NumPy/Numba, no alpha channel, or padded
+    rowstride) and the caller should composite through GdkPixbuf.
+    '''
+    if numpy is None or njit is None:
+        return None
+    if not pixbuf.get_has_alpha():
+        return None
+    width = pixbuf.get_width()
+    height = pixbuf.get_height()
+    if pixbuf.get_rowstride() != width * 4:
+        # Rows are padded; keep the kernel simple and let GdkPixbuf
+        # handle this (rare) layout.
+        return None
+    rgba = numpy.frombuffer(pixbuf.get_pixels(),
+                            dtype=numpy.uint8).reshape(height, width, 4)
+    bg = numpy.array(((color >> 16) & 0xFF, (color >> 8) & 0xFF,
+                      color & 0xFF), dtype=numpy.uint8)
+    out = numpy.empty((height, width, 4), dtype=numpy.uint8)
+    _composite_rows(rgba, bg, out)
+    return GdkPixbuf.Pixbuf.new_from_bytes(
+        GLib.Bytes.new(out.tobytes()), GdkPixbuf.Colorspace.RGB,
+        True, 8, width, height, width * 4)
+
+# vim: expandtab:sw=4:ts=4
@@ -0,0 +1,64 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+'''_exif_hex.pyx - One-pass hex decoder for PNG 'Raw profile type exif'.
+
+Optional C extension; since setup.py is disabled in this tree, build it
+in place with:
+
+    cythonize -i mcomix/mcomix/_exif_hex.pyx
+
+image_tools falls back to a pure-Python decoder when the compiled
+module is unavailable.
+'''
+
+from cpython.bytes cimport PyBytes_FromStringAndSize, PyBytes_AS_STRING
+
+cdef signed char _HEXVAL[256]
+
+cdef int _i
+for _i in range(256):
+    _HEXVAL[_i] = -1
+for _i in range(10):
+    _HEXVAL[0x30 + _i] = _i
+for _i in range(6):
+    _HEXVAL[0x41 + _i] = 10 + _i
+    _HEXVAL[0x61 + _i] = 10 + _i
+
+
+def decode_png_exif(str profile, Py_ssize_t size):
+    '''Decode the hex text <profile> (whitespace ignored) into <size>
+    bytes in a single pass. Return the decoded bytes, or None if the
+    payload is malformed or its length does not match <size>.
+    '''
+    cdef bytes raw
+    try:
+        raw = profile.encode('ascii')
+    except UnicodeEncodeError:
+        return None
+    cdef const unsigned char* src = raw
+    cdef Py_ssize_t n = len(raw)
+    cdef bytes out = PyBytes_FromStringAndSize(NULL, size)
+    cdef unsigned char* dst = <unsigned char*>PyBytes_AS_STRING(out)
+    cdef Py_ssize_t i = 0, j = 0
+    cdef int hi = -1, v
+    cdef unsigned char c
+    while i < n:
+        c = src[i]
+        i += 1
+        v = _HEXVAL[c]
+        if v < 0:
+            if c == 0x20 or c == 0x09 or c == 0x0A or c == 0x0D:
+                continue
+            return None
+        if hi < 0:
+            hi = v
+        else:
+            if j >= size:
+                return None
+            dst[j] = <unsigned char>((hi << 4) | v)
+            j += 1
+            hi = -1
+    if hi >= 0 or j != size:
+        return None
+    return out
+
+# vim: expandtab:sw=4:ts=4
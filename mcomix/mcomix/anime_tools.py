@@ -2,6 +2,7 @@
 import math
 from gi.repository import GdkPixbuf
 
+from mcomix import _composite
 from mcomix import constants
 from mcomix.preferences import prefs
 
@@ -33,10 +34,15 @@ class AnimeFrameBuffer:
             self.width=width
             self.height=height
         if prefs['animation background'] and background:
-            pixbuf=pixbuf.composite_color_simple(
-                width,height,GdkPixbuf.InterpType.NEAREST,
-                255,1024,background,background
-            )
+            # prefer the JIT row-parallel kernel if available
+            composited=_composite.composite_over_color(pixbuf,background)
+            if composited is not None:
+                pixbuf=composited
+            else:
+                pixbuf=pixbuf.composite_color_simple(
+                    width,height,GdkPixbuf.InterpType.NEAREST,
+                    255,1024,background,background
+                )
         self.framelist[index]=(pixbuf,duration)
         self.duration=math.gcd(duration,self.duration)
 
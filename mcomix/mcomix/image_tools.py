@@ -37,35 +37,73 @@ if tools.use_gui():
     GTK_GDK_COLOR_BLACK = Gdk.color_parse('black')
     GTK_GDK_COLOR_WHITE = Gdk.color_parse('white')
 
-def _getexif(im):
-    exif={}
+# Precomputed table dropping the whitespace between hex digits, so the
+# profile text is walked once by str.translate and once by a2b_hex,
+# both at C level, instead of line by line in Python.
+_HEX_WHITESPACE = dict.fromkeys(map(ord, ' \t\r\n\x0b\x0c'))
+
+def _decode_png_exif(profile, size):
+    '''Decode the hex payload of a PNG 'Raw profile type exif' text
+    chunk into <size> bytes. Return None if the payload is malformed
+    or the decoded length does not match <size>.
+    '''
     try:
-        exif.update(im.getexif())
-    except AttributeError:
-        pass
+        data=binascii.a2b_hex(profile.translate(_HEX_WHITESPACE))
+    except (binascii.Error,ValueError):
+        return None
+    if len(data)!=size:
+        return None
+    return data
+
+try:
+    # optional compiled one-pass decoder, see _exif_hex.pyx
+    from mcomix._exif_hex import decode_png_exif
+except ImportError:
+    decode_png_exif = _decode_png_exif
+
+def _getexif(im):
+    # Parsing is not free (the PNG path hex-decodes a whole text
+    # chunk), so cache the result on the image.
+    if (exif:=getattr(im,'_exif_cache',None)) is not None:
+        return exif
+    im._exif_cache=exif={}
+
+    # PIL slices the format-specific Exif payload (JPEG APP1 segment,
+    # PNG eXIf chunk) into im.info at open time; parse that blob
+    # directly instead of a full im.getexif() traversal of the file.
+    if (data:=im.info.get('exif')):
+        try:
+            parsed=Image.Exif()
+            parsed.load(data)
+            exif.update(parsed)
+        except Exception:
+            pass
+    if not exif:
+        try:
+            exif.update(im.getexif())
+        except AttributeError:
+            pass
     if exif:
         return exif
 
     # Exif of PNG is still buggy in Pillow 6.0.0
     try:
-        l1,l2,size,*lines=im.info.get('Raw profile type exif').splitlines()
+        l1,l2,size,hexdata=im.info.get('Raw profile type exif').split('\n',3)
         if l2!='exif':
             # Not valid Exif data.
-            return {}
-        size=int(size)
-        data=binascii.unhexlify(''.join(lines))
-        if len(data)!=size:
-            # Size not match.
-            return {}
+            return exif
+        data=decode_png_exif(hexdata,int(size))
+        if data is None:
+            # Malformed payload or size not match.
+            return exif
         im.info['exif']=data
+        # Load Exif directly from the decoded blob; no need to run a
+        # full im.getexif() pass a second time.
+        png_exif=Image.Exif()
+        png_exif.load(data)
+        exif.update(png_exif)
     except:
         # Not valid Exif data.
-        return {}
-
-    # load Exif again
-    try:
-        exif.update(im.getexif())
-    except AttributeError:
         pass
     return exif
 
@@ -355,6 +393,11 @@ def pixbuf_to_pil(pixbuf):
     stride = pixbuf.get_rowstride()
     pixels = pixbuf.get_pixels()
     mode = 'RGBA' if pixbuf.get_has_alpha() else 'RGB'
+    # For RGBA, frombuffer() maps the image over <pixels> without
+    # another copy (PIL holds its own reference to the buffer); RGB is
+    # not mappable and gets copied. get_pixels() itself always returns
+    # a copy, as gobject-introspection exposes no way to share the
+    # pixbuf's own pixel storage.
     im = Image.frombuffer(mode, dimensions, pixels, 'raw', mode, stride, 1)
     return im
 
@@ -424,6 +467,38 @@ def load_animation(im):
                         background=background)
     return anime.create_animation()
 
+# File headers of formats GdkPixbuf may handle but PIL cannot decode
+# unless an optional plugin has registered itself (keyed by the format
+# name such a plugin would register).
+_NON_PIL_MAGICS = (
+    ('AVIF', lambda head: head[4:12] in (b'ftypavif', b'ftypavis')),
+    ('JXL', lambda head: head[:2] == b'\xff\x0a'
+     or head[:12] == b'\x00\x00\x00\x0cJXL \r\n\x87\n'),
+)
+
+def _pil_can_open(head):
+    ''' Guess from the file header <head> whether PIL stands a chance
+    of decoding the image, so a doomed full PIL decode attempt is not
+    paid just to reach the GdkPixbuf fallback. Unknown headers err on
+    the side of letting PIL try. '''
+    Image.init()
+    for fmt, sniff in _NON_PIL_MAGICS:
+        if sniff(head) and fmt not in Image.OPEN:
+            return False
+    return True
+
+def _pixbuf_snapshot(pixbuf):
+    ''' Take an immutable snapshot of an animation frame. Sharing the
+    pixel data through a GBytes avoids a second buffer allocation when
+    the frame is already backed by read-only storage; for loader-owned
+    frames GdkPixbuf makes a single copy, the same cost as copy(). '''
+    snapshot = GdkPixbuf.Pixbuf.new_from_bytes(
+        pixbuf.read_pixel_bytes(), pixbuf.get_colorspace(),
+        pixbuf.get_has_alpha(), pixbuf.get_bits_per_sample(),
+        pixbuf.get_width(), pixbuf.get_height(), pixbuf.get_rowstride())
+    pixbuf.copy_options(snapshot)
+    return snapshot
+
 def load_pixbuf(path):
     ''' Loads a pixbuf from a given image file. '''
     enable_anime = prefs['animation mode'] != constants.ANIMATION_DISABLED
@@ -431,14 +506,16 @@ def load_pixbuf(path):
     loop = None
     try:
         with reader.LockedFileIO(path) as fio:
-            with Image.open(fio) as im:
-                # make sure n_frames loaded
-                im.load()
-                if enable_anime and getattr(im,'is_animated',False):
-                    n_frames = im.n_frames
-                    loop = im.info['loop']
-                    return load_animation(im)
-                return pil_to_pixbuf(im, keep_orientation=True)
+            if _pil_can_open(fio.read(12)):
+                fio.seek(0)
+                with Image.open(fio) as im:
+                    # make sure n_frames loaded
+                    im.load()
+                    if enable_anime and getattr(im,'is_animated',False):
+                        n_frames = im.n_frames
+                        loop = im.info['loop']
+                        return load_animation(im)
+                    return pil_to_pixbuf(im, keep_orientation=True)
     except:
         pass
     if not enable_anime:
@@ -451,12 +528,18 @@ def load_pixbuf(path):
     if n_frames<2:
         # only one frame
         return pixbuf
+    if not prefs['animation transform'] \
+       and prefs['animation mode'] == constants.ANIMATION_NORMAL:
+        # No per-frame transform and no loop override wanted: the
+        # decoder's own animation can be shown as-is, so skip copying
+        # every frame into an AnimeFrameBuffer. Memory stays O(1) in
+        # the frame count instead of duplicating the whole animation.
+        return pixbuf
     # assume PIL and GdkPixbuf count frames in same way.
     anime=anime_tools.AnimeFrameBuffer(n_frames,loop=loop)
     frame_iter=pixbuf.get_iter(cur:=GLib.TimeVal())
     for n in range(n_frames):
-        frame=(frame_ref:=frame_iter.get_pixbuf()).copy()
-        frame_ref.copy_options(frame)
+        frame=_pixbuf_snapshot(frame_iter.get_pixbuf())
         cur.tv_usec+=(delay:=frame_iter.get_delay_time())*1000
         while not frame_iter.advance(cur):
             cur.tv_usec+=(delay:=delay+frame_iter.get_delay_time())*1000
@@ -472,6 +555,10 @@ def load_pixbuf_size(path, width, height):
     try:
         with reader.LockedFileIO(path) as fio:
             with Image.open(fio) as im:
+                # For JPEG this makes libjpeg decode directly to the
+                # nearest 1/2, 1/4 or 1/8 scale (and straight to RGB),
+                # skipping most of the IDCT work; no-op elsewhere.
+                im.draft('RGB', (width, height))
                 im.thumbnail((width, height), resample=Image.BOX)
                 return pil_to_pixbuf(im, keep_orientation=True)
     except:
@@ -485,17 +572,22 @@ def load_pixbuf_size(path, width, height):
             width, height = image_width, image_height
         return GdkPixbuf.Pixbuf.new_from_file_at_size(path, width, height)
 
-def load_pixbuf_data(imgdata):
-    ''' Loads a pixbuf from the data passed in <imgdata>. '''
-    try:
-        with Image.open(BytesIO(imgdata)) as im:
-            return pil_to_pixbuf(im, keep_orientation=True)
-    except:
-        pass
-    loader = GdkPixbuf.PixbufLoader()
-    loader.write(imgdata)
-    loader.close()
-    return loader.get_pixbuf()
+def load_pixbuf_data(imgdata, keep_orientation=False):
+    ''' Loads a pixbuf from the data passed in <imgdata>.
+
+    Exif parsing is skipped unless <keep_orientation> is True: the
+    callers of this function load icons and logos, which have no use
+    for orientation metadata. '''
+    if _pil_can_open(imgdata[:12]):
+        try:
+            with Image.open(BytesIO(imgdata)) as im:
+                return pil_to_pixbuf(im, keep_orientation=keep_orientation)
+        except:
+            pass
+    # Hand GdkPixbuf a stream over the buffer instead of pushing the
+    # data chunk-wise through a PixbufLoader, which copies it again.
+    stream = Gio.MemoryInputStream.new_from_bytes(GLib.Bytes.new(imgdata))
+    return GdkPixbuf.Pixbuf.new_from_stream(stream, None)
 
 def enhance(pixbuf, brightness=1.0, contrast=1.0, saturation=1.0,
             sharpness=1.0, autocontrast=False):
@@ -77,14 +77,14 @@ class OpenWithCommand(object):
             return
 
         current_dir = os.getcwd()
-        thread = None
+        future = None
         try:
             if self.is_valid_workdir(window):
                 workdir = self.parse(window, text=self.get_cwd())[0]
                 os.chdir(workdir)
 
             args = self.parse(window)
-            thread = process.call_thread(args)
+            future = process.call_thread(args)
 
         except Exception as e:
             text = _('Could not run command %(cmdlabel)s: %(exception)s') % \
@@ -93,8 +93,15 @@ class OpenWithCommand(object):
         finally:
             os.chdir(current_dir)
 
-        if thread != None:
-            thread.join()
+        if future != None:
+            # wait for the command to finish before checking whether
+            # it moved or deleted the current archive
+            try:
+                future.result()
+            except Exception as e:
+                text = _('Could not run command %(cmdlabel)s: %(exception)s') % \
+                    {'cmdlabel': self.get_label(), 'exception': str(e)}
+                window.osd.show(text)
             # if archive was moved or deleted by executed command open next one
             if not os.path.isfile(window.filehandler._current_file):
                 if window.filehandler._open_next_archive(file_list_before_command):
@@ -1,11 +1,14 @@
 '''process.py - Process spawning module.'''
 
+import asyncio
+import functools
 import gc
+import re
 import sys
 import os
 import shutil
 import subprocess
-from threading import Thread
+from threading import Lock, Thread
 
 from mcomix import log
 from mcomix import i18n
@@ -16,17 +19,16 @@ NULL = subprocess.DEVNULL
 PIPE = subprocess.PIPE
 STDOUT = subprocess.STDOUT
 
+# The filesystem encoding cannot change at runtime, so look it up once
+# instead of on every spawned command.
+_fs_encoding = sys.getfilesystemencoding()
+
 # Convert argument vector to system's file encoding where necessary
 # to prevent automatic conversion when appending Unicode strings
 # to byte strings later on.
 def _fix_args(args):
-    fixed_args = []
-    for arg in args:
-        if isinstance(arg, str):
-            fixed_args.append(arg.encode(sys.getfilesystemencoding()))
-        else:
-            fixed_args.append(arg)
-    return fixed_args
+    return [arg.encode(_fs_encoding) if type(arg) is str else arg
+            for arg in args]
 
 def _get_creationflags():
     if 'win32' == sys.platform:
@@ -35,9 +37,37 @@ def _get_creationflags():
     else:
         return 0
 
+if 'win32' != sys.platform:
+    def _posix_spawn_quiet(args):
+        # Spawn via posix_spawn(3) with stdio redirected to /dev/null.
+        # Unlike fork(), this does not duplicate the parent's page
+        # tables, which is measurable once many decoded pages are
+        # resident and an archive extraction spawns dozens of helpers.
+        devnull = os.open(os.devnull, os.O_RDWR)
+        try:
+            return os.posix_spawnp(
+                args[0], args, os.environ,
+                file_actions=(
+                    (os.POSIX_SPAWN_DUP2, devnull, 0),
+                    (os.POSIX_SPAWN_DUP2, devnull, 1),
+                    (os.POSIX_SPAWN_DUP2, devnull, 2),
+                ))
+        finally:
+            os.close(devnull)
+
 # Cannot spawn processes with PythonW/Win32 unless stdin
 # and stderr are redirected to a pipe/devnull as well.
 def call(args, stdin=NULL, stdout=NULL, stderr=NULL, universal_newlines=False):
+    if ('win32' != sys.platform and not universal_newlines
+        and NULL == stdin == stdout == stderr):
+        pid = _posix_spawn_quiet(_fix_args(args))
+        try:
+            status = os.waitpid(pid, 0)[1]
+        except ChildProcessError:
+            # Already reaped by the SIGCHLD handler installed in
+            # run.py; assume success, as subprocess does on ECHILD.
+            return True
+        return 0 == status
     return 0 == subprocess.call(_fix_args(args), stdin=stdin,
                                 stdout=stdout,
                                 universal_newlines=universal_newlines,
@@ -49,21 +79,50 @@ def popen(args, stdin=NULL, stdout=PIPE, stderr=NULL, universal_newlines=False):
                             universal_newlines=universal_newlines,
                             creationflags=_get_creationflags())
 
-def call_thread(args):
-    # call command in thread, so drop std* and set no buffer
-    params=dict(
-        stdin=NULL,stdout=NULL,stderr=NULL,
-        bufsize=0,creationflags=_get_creationflags()
-    )
-    thread=Thread(target=subprocess.call,
-                  args=(args,),kwargs=params,daemon=True)
-    thread.start()
+# Shared event loop for fire-and-forget commands; started on demand
+# and multiplexes any number of children on a single daemon thread.
+_reactor=None
+_reactor_lock=Lock()
+
+def _get_reactor():
+    global _reactor
+    with _reactor_lock:
+        if _reactor is None:
+            loop=asyncio.new_event_loop()
+            Thread(target=loop.run_forever,daemon=True).start()
+            _reactor=loop
+    return _reactor
+
+async def _call_quiet(args):
+    # call command with std* dropped; keep the collector out of the
+    # spawn itself, so a GC pass cannot walk (and copy-on-write fault)
+    # the heap while the child is being created
+    gc.disable()
+    try:
+        proc=await asyncio.create_subprocess_exec(
+            *args,stdin=NULL,stdout=NULL,stderr=NULL,
+            creationflags=_get_creationflags())
+    finally:
+        gc.enable()
+    return await proc.wait()
 
-    return thread
+def call_thread(args):
+    # schedule command on the shared reactor loop instead of spawning
+    # a dedicated waiter thread per command
+    return asyncio.run_coroutine_threadsafe(
+        _call_quiet(args),_get_reactor())
 
 if 'win32' == sys.platform:
     _exe_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
 
+# shutil.which() stats every directory in PATH on each call, and
+# extractor discovery runs on every archive open; memoize per name.
+# PATH is part of the key so the cache invalidates itself if the
+# environment changes.
+@functools.lru_cache(maxsize=256)
+def _which_cached(name, path):
+    return shutil.which(name, path=path)
+
 def find_executable(candidates, workdir=None, is_valid_candidate=None):
     ''' Find executable in path.
 
@@ -85,7 +144,7 @@ def find_executable(candidates, workdir=None, is_valid_candidate=None):
         is_valid = lambda exe: True
 
     for name in candidates:
-        path = shutil.which(name)
+        path = _which_cached(name, os.environ.get('PATH', None))
         if not path:
             continue
         if not is_valid(path):
@@ -95,10 +154,10 @@ def find_executable(candidates, workdir=None, is_valid_candidate=None):
     return None
 
 
-def Win32Popen(cmd):
-    ''' Spawns a new process on Win32. cmd is a list of parameters.
-    This method's sole purpose is calling CreateProcessW, not
-    CreateProcessA as it is done by subprocess.Popen. '''
+if 'win32' == sys.platform:
+    # Set up the ctypes bindings for CreateProcessW once at module
+    # load; redeclaring the structures and argtypes on every spawn is
+    # not free, and thumbnail batches spawn a lot.
     import ctypes
 
     # Declare common data types
@@ -135,13 +194,40 @@ def Win32Popen(cmd):
 
     LPSTRARTUPINFO = ctypes.POINTER(StartupInfo)
     LPROCESS_INFORMATION = ctypes.POINTER(ProcessInformation)
-    ctypes.windll.kernel32.CreateProcessW.argtypes = [LPTSTR, LPTSTR,
+    _CreateProcessW = ctypes.windll.kernel32.CreateProcessW
+    _CreateProcessW.argtypes = [LPTSTR, LPTSTR,
         ctypes.c_void_p, ctypes.c_void_p, ctypes.c_bool, DWORD,
         ctypes.c_void_p, LPTSTR, LPSTRARTUPINFO, LPROCESS_INFORMATION]
-    ctypes.windll.kernel32.CreateProcessW.restype = ctypes.c_bool
+    _CreateProcessW.restype = ctypes.c_bool
+    _CloseHandle = ctypes.windll.kernel32.CloseHandle
+
+# Precompiled pieces of the MS command line quoting rules, so encoding
+# long argument vectors does not walk every argument char by char in
+# Python like subprocess.list2cmdline does.
+_needs_quoting = re.compile(r'[\s"]').search
+_escape_quotes = re.compile(r'(\\*)"')
+_escape_tail = re.compile(r'(\\+)$')
+
+def _fast_list2cmdline(seq):
+    parts = []
+    for arg in seq:
+        if arg and not _needs_quoting(arg):
+            parts.append(arg)
+        else:
+            # Backslashes are doubled before an (escaped) quote and at
+            # the end of a quoted argument, per the MS parsing rules.
+            arg = _escape_quotes.sub(r'\1\1\\"', arg)
+            arg = _escape_tail.sub(r'\1\1', arg)
+            parts.append('"%s"' % arg)
+    return ' '.join(parts)
+
+def Win32Popen(cmd):
+    ''' Spawns a new process on Win32. cmd is a list of parameters.
+    This method's sole purpose is calling CreateProcessW, not
+    CreateProcessA as it is done by subprocess.Popen. '''
 
     # Convert list of arguments into a single string
-    cmdline = subprocess.list2cmdline(cmd)
+    cmdline = _fast_list2cmdline(cmd)
     buffer = ctypes.create_unicode_buffer(cmdline)
 
     # Resolve executable path.
@@ -154,13 +240,13 @@ def Win32Popen(cmd):
     processinfo = ProcessInformation()
 
     # Spawn new process
-    success = ctypes.windll.kernel32.CreateProcessW(exe, buffer,
+    success = _CreateProcessW(exe, buffer,
             None, None, False, 0, None, None, ctypes.byref(startupinfo),
             ctypes.byref(processinfo))
 
     if success:
-        ctypes.windll.kernel32.CloseHandle(processinfo.hProcess)
-        ctypes.windll.kernel32.CloseHandle(processinfo.hThread)
+        _CloseHandle(processinfo.hProcess)
+        _CloseHandle(processinfo.hThread)
         return processinfo.dwProcessId
     else:
         raise ctypes.WinError(ctypes.GetLastError(),
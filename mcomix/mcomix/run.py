@@ -1,4 +1,5 @@
 
+import gc
 import os
 import sys
 import argparse
@@ -168,6 +169,12 @@ def run():
     log.info('Image loaders: Pillow [%s], GDK [%s])',
              PIL.__version__,GdkPixbuf.PIXBUF_VERSION)
 
+    # Pillow-SIMD is a drop-in replacement for Pillow with vectorized
+    # resampling kernels; it identifies itself with a '.postN' suffix
+    # on the version number.
+    if '.post' in PIL.__version__:
+        log.info('Pillow-SIMD detected, resampling will use SIMD kernels.')
+
     if not os.path.exists(constants.DATA_DIR):
         os.makedirs(constants.DATA_DIR, 0o700)
 
@@ -228,6 +235,12 @@ def run():
 
     for sig in (signal.SIGINT, signal.SIGTERM):
         signal.signal(sig, lambda signum, stack: GLib.idle_add(window.terminate_program))
+    # Everything allocated up to this point lives for the whole
+    # session; moving it into the collector's permanent generation
+    # keeps future GC passes from walking it, and avoids copy-on-write
+    # faults over those pages when external commands are spawned.
+    gc.freeze()
+
     try:
         Gtk.main()
     except KeyboardInterrupt: # Will not always work because of threading.